@@ -2,8 +2,32 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
+import shutil
+
+import numpy as np
 import pandas as pd
-import requests
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+import urllib3
+
+
+# One pool per process: repeated downloads from stooq.com reuse keep-alive
+# connections instead of paying a new TCP+TLS handshake each time.
+_POOL = urllib3.PoolManager(maxsize=8, retries=urllib3.Retry(3, backoff_factor=0.3))
+_HEADERS = urllib3.make_headers(accept_encoding=True)
+
+
+# Typed at parse time so no post-hoc to_datetime / to_numeric passes are needed.
+_OHLCV_TYPES = {
+    "Date": pa.timestamp("ns"),
+    "Open": pa.float64(),
+    "High": pa.float64(),
+    "Low": pa.float64(),
+    "Close": pa.float64(),
+    "Volume": pa.float64(),  # float so "1500.0" parses; cast to int64 after fillna
+}
+_PRICE_COLS = ["Open", "High", "Low", "Close"]
 
 
 @dataclass(frozen=True)
@@ -27,33 +51,113 @@ def download_csv(symbol: str, cache_dir: Path, force: bool = False, timeout_s: i
         return out
 
     url = stooq_url(StooqSpec(symbol=symbol))
-    resp = requests.get(url, timeout=timeout_s)
-    resp.raise_for_status()
-    out.write_bytes(resp.content)
+    # Stream to a temp file so the body is never held in memory and an interrupted
+    # download does not leave a truncated CSV behind as a cache hit.
+    tmp = out.with_suffix(".part")
+    resp = _POOL.request("GET", url, headers=_HEADERS, timeout=timeout_s, preload_content=False)
+    try:
+        if resp.status >= 400:
+            raise RuntimeError(f"Download failed: HTTP {resp.status} for {url}")
+        try:
+            with open(tmp, "wb") as f:
+                shutil.copyfileobj(resp, f, length=1 << 16)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+    finally:
+        resp.release_conn()  # hand the keep-alive connection back to the pool
+    tmp.replace(out)
+    _materialize_parquet(out)
     return out
 
 
-def load_ohlcv(path: Path) -> pd.DataFrame:
+def parquet_sidecar(csv_path: Path) -> Path:
+    return csv_path.with_suffix(".parquet")
+
+
+def _materialize_parquet(csv_path: Path) -> pd.DataFrame:
+    """
+    Parse csv_path and persist the typed frame as a zstd Parquet sidecar next to it,
+    so later loads skip CSV parsing entirely.
+    Written to a temp file and renamed into place, so an interrupted write never leaves
+    a truncated sidecar; if the cache dir is not writable the parsed frame is still returned.
+    """
+    df = _read_ohlcv_csv(csv_path)
+    sidecar = parquet_sidecar(csv_path)
+    tmp = sidecar.with_name(sidecar.name + ".part")
+    try:
+        pq.write_table(pa.Table.from_pandas(df), tmp, compression="zstd")
+        tmp.replace(sidecar)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+    return df
+
+
+def load_ohlcv(path: Path, price_dtype: type = np.float64) -> pd.DataFrame:
     """
     Canonical format:
       index: Date (datetime)
       cols: Open, High, Low, Close, Volume
+    Reads the Parquet sidecar when it is at least as new as the CSV and readable;
+    otherwise parses the CSV and (re)writes the sidecar.
+    price_dtype=np.float32 holds the OHLC columns in half the memory, at the cost of
+    ~7 significant digits (e.g. 4-decimal quotes above ~$512 are no longer exact).
+    The cast happens on the Arrow table before conversion, so no float64 frame is
+    materialized when the sidecar is used.
     """
-    df = pd.read_csv(path)
-    required = {"Date", "Open", "High", "Low", "Close"}
-    missing = required - set(df.columns)
+    sidecar = parquet_sidecar(path)
+    table = None
+    if sidecar.exists() and sidecar.stat().st_mtime >= path.stat().st_mtime:
+        try:
+            table = pq.read_table(sidecar)
+        except (OSError, pa.ArrowException):
+            table = None  # unreadable sidecar: reparse the CSV and rewrite it
+    if table is None:
+        df = _materialize_parquet(path)
+        if price_dtype != np.float64:
+            df = df.astype({c: price_dtype for c in _PRICE_COLS})
+        return df
+
+    if price_dtype != np.float64:
+        arrow_type = pa.from_numpy_dtype(price_dtype)
+        schema = pa.schema([
+            f.with_type(arrow_type) if f.name in _PRICE_COLS else f for f in table.schema
+        ], metadata=table.schema.metadata)
+        table = table.cast(schema)
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def _read_ohlcv_csv(path: Path) -> pd.DataFrame:
+    try:
+        table = pacsv.read_csv(path, convert_options=pacsv.ConvertOptions(
+            column_types=_OHLCV_TYPES,
+            null_values=pacsv.ConvertOptions().null_values + ["None"],
+            strings_can_be_null=True,
+        ))
+        columns = table.column_names
+    except pa.ArrowInvalid:
+        # A value the typed parse cannot convert (stray text in a numeric column):
+        # fall back to pandas and coerce bad values to NaN.
+        table = None
+        df = pd.read_csv(path)
+        columns = list(df.columns)
+
+    required = {"Date", *_PRICE_COLS}
+    missing = required - set(columns)
     if missing:
-        raise ValueError(f"CSV missing columns {missing}. Columns={list(df.columns)}")
+        raise ValueError(f"CSV missing columns {missing}. Columns={columns}")
 
-    df["Date"] = pd.to_datetime(df["Date"], utc=False)
-    df = df.sort_values("Date").set_index("Date")
+    if table is not None:
+        df = table.to_pandas(split_blocks=True, self_destruct=True)
+        del table
+    else:
+        df["Date"] = pd.to_datetime(df["Date"], utc=False)
+        for c in _PRICE_COLS + (["Volume"] if "Volume" in df.columns else []):
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype(np.float64)
 
-    for c in ["Open", "High", "Low", "Close"]:
-        df[c] = pd.to_numeric(df[c], errors="coerce")
+    df = df.dropna(subset=_PRICE_COLS).set_index("Date").sort_index()
     if "Volume" in df.columns:
-        df["Volume"] = pd.to_numeric(df["Volume"], errors="coerce").fillna(0).astype("int64")
+        df["Volume"] = df["Volume"].fillna(0).astype("int64")
     else:
         df["Volume"] = 0
-
-    df = df.dropna(subset=["Open", "High", "Low", "Close"])
     return df
@@ -1,10 +1,30 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Dict, List, NamedTuple, Optional
+import numpy as np
 import pandas as pd
 
 
+SIDE_CODES = {"BUY": 1, "SELL": -1}
+SIDE_NAMES = np.array(["", "BUY", "SELL"], dtype=object)  # indexed by side code (-1 -> SELL)
+
+
+class Snap(NamedTuple):
+    """Mark-to-market state at one point in time (see Portfolio.snapshot)."""
+    cash: float
+    mv: float
+    equity: float
+    realized: float
+    unreal: float
+    gross: float
+    net: float
+
+
+# Output column name for each Snap field, in field order.
+SNAP_COLUMNS = ("Cash", "MarketValue", "Equity", "RealizedPnL", "UnrealizedPnL", "GrossExposure", "NetExposure")
+
+
 @dataclass
 class Fill:
     date: pd.Timestamp
@@ -15,8 +35,9 @@ class Fill:
     commission: float
 
 
-@dataclass
+@dataclass(frozen=True)
 class Position:
+    """Read-only view of one row of Portfolio's positions table; change it via apply_fill."""
     symbol: str
     qty: int = 0
     avg_cost: float = 0.0  # average cost per share
@@ -31,20 +52,67 @@ class Portfolio:
     Accounting:
       - Avg cost tracking for realized PnL
       - Cash updates with commissions
+    Storage is struct-of-arrays: positions are rows of parallel qty/avg_cost arrays
+    (symbol -> row via `_rows`), fills are parallel column arrays grown geometrically.
+    get_position/positions therefore return frozen copies of a row, not live objects.
     """
+    _INITIAL_CAPACITY = 64
+
     def __init__(self, initial_cash: float):
         if initial_cash <= 0:
             raise ValueError("initial_cash must be positive")
         self.initial_cash = float(initial_cash)
         self.cash = float(initial_cash)
-        self.positions: Dict[str, Position] = {}
         self.realized_pnl = 0.0
-        self.fills: List[Fill] = []
+
+        # positions table
+        self._rows: Dict[str, int] = {}
+        self._qty = np.zeros(0, dtype=np.int64)
+        self._avg_cost = np.zeros(0, dtype=np.float64)
+
+        # fills log
+        cap = self._INITIAL_CAPACITY
+        self.num_fills = 0
+        self.fills_date = np.empty(cap, dtype="datetime64[ns]")
+        self.fills_sym = np.empty(cap, dtype=np.int64)
+        self.fills_side = np.empty(cap, dtype=np.int8)
+        self.fills_qty = np.empty(cap, dtype=np.int64)
+        self.fills_px = np.empty(cap, dtype=np.float64)
+        self.fills_comm = np.empty(cap, dtype=np.float64)
+
+    def _ensure_capacity(self, n: int) -> None:
+        """Grow the fills arrays (doubling) so at least n fills fit."""
+        cap = self.fills_qty.size
+        if n <= cap:
+            return
+        while cap < n:
+            cap *= 2
+        for name in ("fills_date", "fills_sym", "fills_side", "fills_qty", "fills_px", "fills_comm"):
+            old = getattr(self, name)
+            new = np.empty(cap, dtype=old.dtype)
+            new[: self.num_fills] = old[: self.num_fills]
+            setattr(self, name, new)
+
+    def _row(self, symbol: str) -> int:
+        row = self._rows.get(symbol)
+        if row is None:
+            row = len(self._rows)
+            self._rows[symbol] = row
+            self._qty = np.append(self._qty, 0)
+            self._avg_cost = np.append(self._avg_cost, 0.0)
+        return row
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self._rows)
+
+    @property
+    def positions(self) -> Dict[str, Position]:
+        return {sym: self.get_position(sym) for sym in self._rows}
 
     def get_position(self, symbol: str) -> Position:
-        if symbol not in self.positions:
-            self.positions[symbol] = Position(symbol=symbol)
-        return self.positions[symbol]
+        row = self._row(symbol)
+        return Position(symbol=symbol, qty=int(self._qty[row]), avg_cost=float(self._avg_cost[row]))
 
     def apply_fill(self, fill: Fill) -> None:
         if fill.qty <= 0:
@@ -52,7 +120,9 @@ class Portfolio:
         if fill.side not in ("BUY", "SELL"):
             raise ValueError("fill.side must be BUY or SELL")
 
-        pos = self.get_position(fill.symbol)
+        row = self._row(fill.symbol)
+        pos_qty = int(self._qty[row])
+        avg_cost = float(self._avg_cost[row])
         qty = fill.qty
         px = float(fill.price)
         comm = float(fill.commission)
@@ -67,50 +137,64 @@ class Portfolio:
                 qty = max_qty
                 total_cost = qty * px + comm
             # update avg cost
-            new_qty = pos.qty + qty
+            new_qty = pos_qty + qty
             if new_qty == 0:
-                pos.avg_cost = 0.0
+                self._avg_cost[row] = 0.0
             else:
-                pos.avg_cost = (pos.avg_cost * pos.qty + px * qty) / new_qty
-            pos.qty = new_qty
+                self._avg_cost[row] = (avg_cost * pos_qty + px * qty) / new_qty
+            self._qty[row] = new_qty
             self.cash -= total_cost
         else:
             # SELL
-            sell_qty = min(qty, pos.qty)  # no shorting in this demo
+            sell_qty = min(qty, pos_qty)  # no shorting in this demo
             if sell_qty <= 0:
                 return
+            qty = sell_qty
             proceeds = sell_qty * px - comm
             # realized pnl = (sell_px - avg_cost) * qty - comm
-            self.realized_pnl += (px - pos.avg_cost) * sell_qty - comm
-            pos.qty -= sell_qty
-            if pos.qty == 0:
-                pos.avg_cost = 0.0
+            self.realized_pnl += (px - avg_cost) * sell_qty - comm
+            self._qty[row] = pos_qty - sell_qty
+            if pos_qty - sell_qty == 0:
+                self._avg_cost[row] = 0.0
             self.cash += proceeds
 
-        self.fills.append(Fill(date=fill.date, symbol=fill.symbol, side=fill.side, qty=qty, price=px, commission=comm))
-
-    def snapshot(self, date: pd.Timestamp, prices: Dict[str, float]) -> Dict:
-        gross = 0.0
-        net = 0.0
-        mv_total = 0.0
-        unreal = 0.0
-
-        for sym, pos in self.positions.items():
-            px = float(prices.get(sym, 0.0))
-            mv = pos.market_value(px)
-            mv_total += mv
-            gross += abs(mv)
-            net += mv
-            unreal += (px - pos.avg_cost) * pos.qty if pos.qty != 0 else 0.0
-
-        equity = self.cash + mv_total
-        return {
-            "Date": date,
-            "Cash": self.cash,
-            "MarketValue": mv_total,
-            "Equity": equity,
-            "RealizedPnL": self.realized_pnl,
-            "UnrealizedPnL": unreal,
-            "GrossExposure": gross,
-            "NetExposure": net,
-        }
+        i = self.num_fills
+        self._ensure_capacity(i + 1)
+        ts = pd.Timestamp(fill.date)
+        if ts.tzinfo is not None:
+            ts = ts.tz_convert(None)  # stored as naive UTC
+        self.fills_date[i] = ts.to_datetime64()
+        self.fills_sym[i] = row
+        self.fills_side[i] = SIDE_CODES[fill.side]
+        self.fills_qty[i] = qty
+        self.fills_px[i] = px
+        self.fills_comm[i] = comm
+        self.num_fills = i + 1
+
+    def fills_df(self) -> pd.DataFrame:
+        n = self.num_fills
+        symbols = np.array(self.symbols, dtype=object)
+        return pd.DataFrame({
+            "Date": self.fills_date[:n],
+            "Symbol": symbols[self.fills_sym[:n]],
+            "Side": SIDE_NAMES[self.fills_side[:n]],
+            "Qty": self.fills_qty[:n],
+            "Price": self.fills_px[:n],
+            "Commission": self.fills_comm[:n],
+        })
+
+    def snapshot(self, date: Optional[pd.Timestamp], prices: Dict[str, float]) -> Snap:
+        # date is accepted for existing snapshot(date=..., prices=...) callers; a Snap carries no date.
+        px = np.array([float(prices.get(sym, 0.0)) for sym in self._rows], dtype=np.float64)
+        mv = self._qty * px
+        mv_total = float(self._qty @ px)
+        unreal = float(((px - self._avg_cost) * self._qty).sum())
+        return Snap(
+            cash=self.cash,
+            mv=mv_total,
+            equity=self.cash + mv_total,
+            realized=self.realized_pnl,
+            unreal=unreal,
+            gross=float(np.abs(mv).sum()),
+            net=mv_total,
+        )
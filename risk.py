@@ -1,9 +1,13 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Dict, List, Optional, Tuple
+import hashlib
+import zipfile
 import numpy as np
 import pandas as pd
+from numba import njit
 
 
 @dataclass(frozen=True)
@@ -19,30 +23,167 @@ class VaRSpec:
     alpha: float = 0.99  # 0.99 => 99% VaR
 
 
-def rolling_historical_var(pnl_series: pd.Series, window: int, alpha: float) -> pd.Series:
+def rolling_historical_var(
+    pnl_series: pd.Series,
+    window: int,
+    alpha: float,
+    state_path: Optional[Path] = None,
+) -> pd.Series:
     """
     Historical VaR on PnL (not returns):
       VaR_t = -quantile(pnl_{t-window+1..t}, 1-alpha)
     If PnL is negative at left tail, VaR becomes positive number.
+
+    With state_path, the kernel state (sorted window buffer + VaR computed so far) is
+    saved there after the run. A later call whose series extends the saved one (same
+    values and index on the saved prefix, same window/alpha) resumes from the end of
+    that prefix, so only the newly appended bars are processed.
     """
     if window < 20:
         raise ValueError("window too small; use >= 20")
 
-    def var_of_window(x: np.ndarray) -> float:
-        q = np.quantile(x, 1.0 - alpha)
-        return float(max(0.0, -q))
-
-    vals = pnl_series.astype(float).to_numpy()
-    out = np.full_like(vals, fill_value=np.nan, dtype=float)
-    for i in range(window - 1, len(vals)):
-        out[i] = var_of_window(vals[i - window + 1 : i + 1])
+    vals = np.ascontiguousarray(pnl_series.to_numpy(dtype=np.float64))
+    out = np.full(vals.size, np.nan)
+    sbuf = np.empty(window)
+    start = 0
+
+    if state_path is not None:
+        state = _load_var_state(state_path, pnl_series, window, alpha)
+        if state is not None:
+            sbuf, prefix_var = state
+            start = prefix_var.size
+            out[:start] = prefix_var
+
+    _rolling_var(vals, int(window), float(alpha), out, sbuf, start)
+
+    if state_path is not None and vals.size >= window:
+        # Write-then-rename so an interrupted run never leaves a truncated state file.
+        tmp = state_path.with_name(state_path.name + ".part")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                window=window,
+                alpha=alpha,
+                digest=_prefix_digest(pnl_series, vals.size),
+                sbuf=sbuf,
+                var=out,
+            )
+        tmp.replace(state_path)
     return pd.Series(out, index=pnl_series.index, name="VaR")
 
 
+def _prefix_digest(pnl_series: pd.Series, n: int) -> str:
+    hashed = pd.util.hash_pandas_object(pnl_series.iloc[:n], index=True).to_numpy()
+    return hashlib.blake2b(hashed.tobytes(), digest_size=16).hexdigest()
+
+
+def _load_var_state(
+    state_path: Path, pnl_series: pd.Series, window: int, alpha: float
+) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """(sbuf, prefix VaR) if state_path holds a resumable state for this series, else None."""
+    if not state_path.exists():
+        return None
+    try:
+        with np.load(state_path) as st:
+            if int(st["window"]) != window or float(st["alpha"]) != alpha:
+                return None
+            prefix_var = st["var"]
+            if prefix_var.size > len(pnl_series):
+                return None
+            if str(st["digest"]) != _prefix_digest(pnl_series, prefix_var.size):
+                return None
+            return st["sbuf"].copy(), prefix_var.copy()
+    except (OSError, EOFError, KeyError, ValueError, zipfile.BadZipFile):
+        return None
+
+
+@njit(cache=True, inline="always")
+def _lerp(lo: float, hi: float, frac: float) -> float:
+    """np.quantile's interpolation: measured from the nearer order statistic."""
+    d = hi - lo
+    return hi - d * (1.0 - frac) if frac >= 0.5 else lo + d * frac
+
+
+@njit(cache=True)
+def _rolling_var(pnl: np.ndarray, window: int, alpha: float, out: np.ndarray, sbuf: np.ndarray, start: int) -> None:
+    """
+    Rolling VaR kernel, writing into out[start:]. Keeps the current window in a sorted
+    buffer and, per step, drops the leaving value and inserts the entering one (binary
+    search + shift), instead of re-sorting every window. Interpolates between the two
+    bracketing order statistics with np.quantile's default (linear) method, so values
+    are identical to the per-window np.quantile. Windows containing NaN give 0.0, as
+    max(0.0, nan) did there; NaN is held in the buffer as +inf so the ordering stays
+    well defined.
+    To resume, pass start >= window with sbuf holding the sorted (NaN -> +inf) values
+    of pnl[start-window:start]; otherwise the buffer is initialised from the first
+    window. sbuf is left holding the last window.
+    """
+    n = pnl.size
+    if n < window:
+        return
+
+    h = (1.0 - alpha) * (window - 1)
+    k = int(np.floor(h))
+    frac = h - k
+    k_hi = min(k + 1, window - 1)
+
+    if start < window:
+        for m in range(window):
+            sbuf[m] = np.inf if np.isnan(pnl[m]) else pnl[m]
+        sbuf.sort()
+        n_nan = 0
+        for m in range(window):
+            n_nan += np.isnan(pnl[m])
+        q = _lerp(sbuf[k], sbuf[k_hi], frac)
+        out[window - 1] = 0.0 if n_nan > 0 else max(0.0, -q)
+        start = window
+    else:
+        n_nan = 0
+        for m in range(start - window, start):
+            n_nan += np.isnan(pnl[m])
+
+    for t in range(start, n):
+        y = pnl[t - window]
+        x = pnl[t]
+        if np.isnan(y):
+            n_nan -= 1
+            y = np.inf
+        if np.isnan(x):
+            n_nan += 1
+            x = np.inf
+        i = np.searchsorted(sbuf, y)
+        j = np.searchsorted(sbuf, x)
+        if j > i:
+            # x lands right of the slot freed by y: shift (i, j) left by one
+            for m in range(i, j - 1):
+                sbuf[m] = sbuf[m + 1]
+            sbuf[j - 1] = x
+        else:
+            # x lands left of (or on) the freed slot: shift [j, i) right by one
+            for m in range(i, j, -1):
+                sbuf[m] = sbuf[m - 1]
+            sbuf[j] = x
+        q = _lerp(sbuf[k], sbuf[k_hi], frac)
+        out[t] = 0.0 if n_nan > 0 else max(0.0, -q)
+
+
 def compute_drawdown(equity: pd.Series) -> pd.Series:
-    peak = equity.cummax()
-    dd = (peak - equity) / peak.replace(0, np.nan)
-    return dd.fillna(0.0).rename("Drawdown")
+    eq = np.ascontiguousarray(equity.to_numpy(dtype=np.float64))
+    return pd.Series(_drawdown(eq), index=equity.index, name="Drawdown")
+
+
+@njit(cache=True)
+def _drawdown(eq: np.ndarray) -> np.ndarray:
+    """Running peak and drawdown vs that peak in one pass; 0 while the peak is 0."""
+    out = np.empty_like(eq)
+    if eq.size == 0:
+        return out
+    peak = eq[0]
+    for i in range(eq.size):
+        if eq[i] > peak:
+            peak = eq[i]
+        out[i] = 0.0 if peak == 0.0 else (peak - eq[i]) / peak
+    return out
 
 
 def check_limits(
@@ -71,3 +212,38 @@ def check_limits(
         alerts.append({"Date": date, "Type": "EQUITY_NONPOSITIVE", "Value": eq, "Limit": 0})
 
     return alerts
+
+
+# Alert types in sort order; column j of the breach mask in limit_breaches maps to _ALERT_TYPES[j].
+_ALERT_TYPES = np.array(["DRAWDOWN", "EQUITY_NONPOSITIVE", "GROSS_EXPOSURE", "VAR"], dtype=object)
+
+
+def limit_breaches(pnl_df: pd.DataFrame, limits: RiskLimits) -> pd.DataFrame:
+    """
+    Whole-series counterpart of check_limits: same rules, evaluated column-wise.
+    Expects GrossExposure, Drawdown, VaR and Equity columns. Returns alerts sorted
+    by (Date, Type) with columns Date, Type, Value, Limit (empty frame if none).
+    """
+    gross = pnl_df["GrossExposure"].to_numpy(dtype=np.float64)
+    dd = pnl_df["Drawdown"].to_numpy(dtype=np.float64)
+    var = pnl_df["VaR"].to_numpy(dtype=np.float64)
+    eq = pnl_df["Equity"].to_numpy(dtype=np.float64)
+
+    values = np.column_stack([dd, eq, gross, var])
+    limit_vals = np.array([limits.max_drawdown, 0.0, limits.max_gross_exposure, limits.max_var])
+    mask = np.column_stack([
+        dd >= limits.max_drawdown,
+        eq <= 0,
+        gross > limits.max_gross_exposure,
+        var > limits.max_var,  # NaN VaR never breaches
+    ])
+
+    rows, cols = np.nonzero(mask)  # row-major => already ordered by (Date, Type)
+    if rows.size == 0:
+        return pd.DataFrame()
+    return pd.DataFrame({
+        "Date": pnl_df.index.to_numpy()[rows],
+        "Type": _ALERT_TYPES[cols],
+        "Value": values[rows, cols],
+        "Limit": limit_vals[cols],
+    })
@@ -4,13 +4,19 @@ import argparse
 from pathlib import Path
 import json
 
-import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+from numba import njit
 
 from .data import download_csv, load_ohlcv
-from .portfolio import Portfolio, Fill
-from .risk import RiskLimits, VaRSpec, rolling_historical_var, compute_drawdown, check_limits
-from .trader import TraderConfig, generate_signals, decide_fill
+from .portfolio import SNAP_COLUMNS
+from .risk import RiskLimits, VaRSpec, rolling_historical_var, compute_drawdown, limit_breaches
+from .trader import TraderConfig, generate_signals, fill_intents
 
 
 def parse_args() -> argparse.Namespace:
@@ -40,17 +46,132 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--cache-dir", default="data", help="Cache directory for downloaded CSV")
     p.add_argument("--out-dir", default="outputs", help="Outputs directory")
     p.add_argument("--force-download", action="store_true", help="Force re-download even if cached")
+    p.add_argument(
+        "--float32-prices",
+        action="store_true",
+        help="Hold OHLC as float32 (half the memory for price columns; accounting still runs in float64)",
+    )
 
     return p.parse_args()
 
 
-def apply_slippage(price: float, side: str, bps: float) -> float:
-    slip = bps / 10000.0
-    if side == "BUY":
-        return price * (1.0 + slip)
-    if side == "SELL":
-        return price * (1.0 - slip)
-    raise ValueError("side must be BUY or SELL")
+def write_csv(df: pd.DataFrame, path: Path, index: bool = True) -> None:
+    """
+    DataFrame.to_csv replacement backed by Arrow's C++ writer, keeping to_csv's schema cues:
+      - float columns always carry a decimal point (100000.0, not 100000), so readers
+        do not re-infer whole-valued float columns as integers; nonzero values below
+        1e-4 are written in repr (scientific) form, as to_csv does
+      - midnight-only naive timestamp columns (daily bars) are written as plain dates, and
+        whole-second timestamps without a fractional part (tz-aware ones keep their offset)
+    """
+    table = pa.Table.from_pandas(df.reset_index() if index else df, preserve_index=False)
+    # Arrow's "needed" quoting wraps every string (including the float text built below),
+    # so only switch it on when a header or text value actually contains a delimiter/quote.
+    needs_quotes = any(any(c in name for c in ',"\r\n') for name in table.column_names)
+    for i, field in enumerate(table.schema):
+        col = table.column(i).combine_chunks()
+        if pa.types.is_string(field.type) or pa.types.is_large_string(field.type):
+            needs_quotes = needs_quotes or bool(pc.any(pc.match_substring_regex(col, r'[",\r\n]')).as_py())
+            continue
+        if pa.types.is_floating(field.type):
+            text = col.cast(pa.string())
+            whole = pc.match_substring_regex(text, r"^-?[0-9]+$")
+            text = pc.if_else(whole, pc.binary_join_element_wise(text, ".0", ""), text)
+            # Arrow spells these in fixed notation (0.0000381...), which pandas' default
+            # float parser does not read back exactly; there are few enough to repr.
+            tiny = pc.fill_null(pc.and_(pc.less(pc.abs(col), 1e-4), pc.not_equal(col, 0.0)), False)
+            if pc.any(tiny).as_py():
+                reprs = pa.array([repr(float(v)) for v in pc.filter(col, tiny).to_numpy()], pa.string())
+                text = pc.replace_with_mask(text, tiny, reprs)
+            col = text
+        elif pa.types.is_timestamp(field.type):
+            tz = field.type.tz
+            if tz is None and pc.all(pc.equal(col, pc.floor_temporal(col, unit="day"))).as_py() is not False:
+                col = col.cast(pa.date32())
+            elif pc.all(pc.equal(col, pc.floor_temporal(col, unit="second"))).as_py() is not False:
+                fmt = "%Y-%m-%d %H:%M:%S" if tz is None else "%Y-%m-%d %H:%M:%S%Ez"
+                col = pc.strftime(col.cast(pa.timestamp("s", tz=tz)), format=fmt)
+        else:
+            continue
+        table = table.set_column(i, field.name, col)
+    quoting = "needed" if needs_quotes else "none"
+    pacsv.write_csv(table, path, write_options=pacsv.WriteOptions(quoting_style=quoting, quoting_header=quoting))
+
+
+@njit(cache=True)
+def simulate(
+    buy_px: np.ndarray,
+    sell_px: np.ndarray,
+    close_px: np.ndarray,
+    want_buy: np.ndarray,
+    want_sell: np.ndarray,
+    cash0: float,
+    size: int,
+    comm: float,
+):
+    """
+    Single-symbol walk-forward of the demo trader, compiled.
+    Same accounting as Portfolio.apply_fill/snapshot; buy_px/sell_px are the day's OPEN
+    with slippage already applied for each side, want_buy/want_sell come from fill_intents.
+    close_px may be float32; it is widened to float64 on use, so cash/equity stay float64.
+      - at each day OPEN: BUY `size` if want_buy (clamped to cash), else SELL down if want_sell
+      - at each day CLOSE: mark to market
+    Returns per-day arrays (cash, qty, avg_cost, equity, realized, fill_qty, fill_px);
+    fill_qty is signed (+ BUY, - SELL, 0 no fill).
+    """
+    n = close_px.size
+    cash_out = np.empty(n)
+    qty_out = np.empty(n, dtype=np.int64)
+    avg_out = np.empty(n)
+    equity_out = np.empty(n)
+    realized_out = np.empty(n)
+    fill_qty = np.empty(n, dtype=np.int64)
+    fill_px = np.empty(n)
+
+    cash = cash0
+    qty = 0
+    avg_cost = 0.0
+    realized = 0.0
+
+    for i in range(n):
+        # --- decide side (+1 BUY, -1 SELL, 0 none) and size ---
+        side = 0
+        q = 0
+        px = 0.0
+        if want_buy[i]:
+            px = buy_px[i]
+            q = size
+            if q * px + comm > cash:
+                # clamp to affordable
+                q = int((cash - comm) // px)
+            side = 1
+        elif want_sell[i] and qty > 0:
+            px = sell_px[i]
+            q = min(size, qty)  # no shorting in this demo
+            side = -1
+        if q <= 0:
+            side = 0
+            q = 0
+
+        # --- apply the fill without branching on side ---
+        is_buy = side > 0
+        is_sell = side < 0
+        new_qty = qty + side * q
+        realized += is_sell * ((px - avg_cost) * q - comm)
+        bought_avg = (avg_cost * qty + px * q) / max(new_qty, 1)
+        avg_cost = bought_avg if is_buy else (avg_cost if new_qty > 0 else 0.0)
+        cash -= side * (q * px) + abs(side) * comm  # BUY: q*px + comm, SELL: -(q*px - comm)
+        qty = new_qty
+        fill_qty[i] = side * q
+        fill_px[i] = px if side != 0 else np.nan
+
+        cash_out[i] = cash
+        qty_out[i] = qty
+        avg_out[i] = avg_cost
+        equity_out[i] = cash + qty * float(close_px[i])
+        realized_out[i] = realized
+
+    return cash_out, qty_out, avg_out, equity_out, realized_out, fill_qty, fill_px
 
 
 def main() -> None:
@@ -60,20 +181,28 @@ def main() -> None:
     out_dir.mkdir(parents=True, exist_ok=True)
 
     csv_path = download_csv(args.ticker, cache_dir=cache_dir, force=args.force_download)
-    ohlcv = load_ohlcv(csv_path)
+    ohlcv = load_ohlcv(csv_path, price_dtype=np.float32 if args.float32_prices else np.float64)
 
-    if args.start:
-        ohlcv = ohlcv.loc[pd.to_datetime(args.start):]
-    if args.end:
-        ohlcv = ohlcv.loc[:pd.to_datetime(args.end)]
+    # Index is sorted by load_ohlcv: bound [start, end] with two binary searches.
+    dates = ohlcv.index.to_numpy()
+    lo = int(np.searchsorted(dates, pd.Timestamp(args.start).to_datetime64(), side="left")) if args.start else 0
+    hi = int(np.searchsorted(dates, pd.Timestamp(args.end).to_datetime64(), side="right")) if args.end else len(dates)
+    ohlcv = ohlcv.iloc[lo:hi]
 
     if len(ohlcv) < max(args.fast, args.slow) + 5:
         raise ValueError("Not enough rows for the MA windows. Use an earlier start or smaller windows.")
 
-    close = ohlcv["Close"].astype(float)
-    regime = generate_signals(close, fast=args.fast, slow=args.slow)
+    # Pull the columns the simulation needs once as arrays (views, in the frame's price
+    # dtype); everything below indexes these rather than iterating DataFrame rows.
+    open_px = ohlcv["Open"].to_numpy()
+    close_px = ohlcv["Close"].to_numpy()
+    regime = generate_signals(ohlcv["Close"], fast=args.fast, slow=args.slow)
+
+    if args.cash <= 0:
+        raise ValueError("initial_cash must be positive")
+    if args.trade_size <= 0:
+        raise ValueError("trade_size must be positive")
 
-    portfolio = Portfolio(initial_cash=float(args.cash))
     limits = RiskLimits(
         max_gross_exposure=float(args.max_gross),
         max_drawdown=float(args.max_dd),
@@ -82,63 +211,41 @@ def main() -> None:
     varspec = VaRSpec(window=int(args.var_window), alpha=float(args.var_alpha))
     trader_cfg = TraderConfig(fast=args.fast, slow=args.slow, trade_size=int(args.trade_size))
 
-    # Walk forward day-by-day:
+    # Walk forward day-by-day (compiled):
     # - at each day OPEN: optionally generate a fill event (demo trader) and apply it
-    # - at each day CLOSE: mark the portfolio, compute rolling risk, log alerts
-    pnl_rows = []
-    alert_rows = []
-
-    for dt, row in ohlcv.iterrows():
-        open_px = float(row["Open"])
-        close_px = float(row["Close"])
-
-        # --- simulate a fill at OPEN (demo) ---
-        pos = portfolio.get_position(args.ticker)
-        reg = int(regime.loc[dt]) if pd.notna(regime.loc[dt]) else 0
-        decision = decide_fill(dt, args.ticker, reg, pos.qty, trader_cfg)
-
-        if decision is not None:
-            side, qty = decision
-            fill_px = apply_slippage(open_px, side=side, bps=float(args.slippage_bps))
-            fill = Fill(
-                date=dt,
-                symbol=args.ticker,
-                side=side,
-                qty=int(qty),
-                price=float(fill_px),
-                commission=float(args.commission),
-            )
-            portfolio.apply_fill(fill)
-
-        # --- mark to market at CLOSE ---
-        snap = portfolio.snapshot(date=dt, prices={args.ticker: close_px})
-        pnl_rows.append(snap)
-
-    pnl_df = pd.DataFrame(pnl_rows).set_index("Date")
+    # - at each day CLOSE: mark the portfolio
+    want_buy, want_sell = fill_intents(regime)
+    slip = float(args.slippage_bps) / 10000.0
+    # Fill prices are float64 either way; the ufunc casts float32 opens on the fly.
+    buy_px = np.multiply(open_px, 1.0 + slip, dtype=np.float64)
+    sell_px = np.multiply(open_px, 1.0 - slip, dtype=np.float64)
+    cash, qty, avg_cost, equity, realized, fill_qty, fill_px = simulate(
+        buy_px, sell_px, close_px, want_buy, want_sell,
+        float(args.cash), int(trader_cfg.trade_size), float(args.commission),
+    )
+
+    mv = qty * close_px
+    snaps = (cash, mv, equity, realized, (close_px - avg_cost) * qty, np.abs(mv), mv)
+    pnl_df = pd.DataFrame(dict(zip(SNAP_COLUMNS, snaps)), index=ohlcv.index.rename("Date"))
     pnl_df["Drawdown"] = compute_drawdown(pnl_df["Equity"])
 
     # Compute portfolio daily PnL for VaR: delta in equity
-    pnl_df["DailyPnL"] = pnl_df["Equity"].diff().fillna(0.0)
-    pnl_df["VaR"] = rolling_historical_var(pnl_df["DailyPnL"], window=varspec.window, alpha=varspec.alpha)
+    pnl_df["DailyPnL"] = np.diff(equity, prepend=equity[:1])
+    pnl_df["VaR"] = rolling_historical_var(
+        pnl_df["DailyPnL"], window=varspec.window, alpha=varspec.alpha,
+        state_path=out_dir / "_var_state.npz",
+    )
 
     # Alerts pass
-    for dt, r in pnl_df.iterrows():
-        snap = r.to_dict()
-        var_val = float(snap.get("VaR")) if "VaR" in snap else None
-        alert_rows.extend(check_limits(dt, snap, var_val, limits))
-
-    alerts_df = pd.DataFrame(alert_rows)
-    if len(alerts_df):
-        alerts_df = alerts_df.sort_values(["Date", "Type"])
+    alerts_df = limit_breaches(pnl_df, limits)
 
     # Positions snapshot table (end-of-run)
-    pos = portfolio.get_position(args.ticker)
     positions_df = pd.DataFrame([{
         "Symbol": args.ticker,
-        "Qty": pos.qty,
-        "AvgCost": pos.avg_cost,
-        "Cash": portfolio.cash,
-        "RealizedPnL": portfolio.realized_pnl,
+        "Qty": int(qty[-1]),
+        "AvgCost": float(avg_cost[-1]),
+        "Cash": float(cash[-1]),
+        "RealizedPnL": float(realized[-1]),
     }])
 
     # Write outputs
@@ -148,10 +255,10 @@ def main() -> None:
     report_path = out_dir / "risk_report.json"
     plot_path = out_dir / "equity_curve.png"
 
-    pnl_df.to_csv(pnl_path)
-    positions_df.to_csv(pos_path, index=False)
+    write_csv(pnl_df, pnl_path)
+    write_csv(positions_df, pos_path, index=False)
     if len(alerts_df):
-        alerts_df.to_csv(alerts_path, index=False)
+        write_csv(alerts_df, alerts_path, index=False)
     else:
         alerts_path.write_text("", encoding="utf-8")
 
@@ -165,7 +272,7 @@ def main() -> None:
         "max_drawdown": float(pnl_df["Drawdown"].max()),
         "max_gross_exposure": float(pnl_df["GrossExposure"].max()),
         "max_var": float(pnl_df["VaR"].max(skipna=True)) if pnl_df["VaR"].notna().any() else None,
-        "num_fills": len(portfolio.fills),
+        "num_fills": int(np.count_nonzero(fill_qty)),
         "num_alerts": int(len(alerts_df)) if len(alerts_df) else 0,
         "limits": {
             "max_gross_exposure": limits.max_gross_exposure,
@@ -178,13 +285,13 @@ def main() -> None:
     report_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
 
     # Plot
-    plt.figure()
-    pnl_df["Equity"].plot()
-    plt.title(f"Equity (with risk tracking): {args.ticker.upper()}")
-    plt.xlabel("Date")
-    plt.ylabel("Equity")
-    plt.tight_layout()
-    plt.savefig(plot_path)
+    fig = Figure(constrained_layout=True)
+    ax = fig.subplots()
+    ax.plot(pnl_df.index.to_numpy(), equity)
+    ax.set_title(f"Equity (with risk tracking): {args.ticker.upper()}")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Equity")
+    FigureCanvasAgg(fig).print_png(plot_path)
 
     print("Done.")
     print(f"Data CSV:   {csv_path}")
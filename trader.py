@@ -1,7 +1,10 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import Tuple
+import numpy as np
 import pandas as pd
+from numba import njit
 
 
 @dataclass(frozen=True)
@@ -16,27 +19,65 @@ class TraderConfig:
 
 
 def generate_signals(close: pd.Series, fast: int, slow: int) -> pd.Series:
-    fast_ma = close.rolling(fast, min_periods=fast).mean()
-    slow_ma = close.rolling(slow, min_periods=slow).mean()
-    sig = (fast_ma > slow_ma).astype(int)  # 1 long regime, 0 flat regime
-    sig.name = "regime"
-    return sig
+    px = close.to_numpy()
+    if px.dtype != np.float32:
+        px = px.astype(np.float64, copy=False)
+    px = np.ascontiguousarray(px)
+    sig = _regime(px, int(fast), int(slow))  # 1 long regime, 0 flat regime
+    return pd.Series(sig, index=close.index, name="regime")
 
 
-def decide_fill(date: pd.Timestamp, symbol: str, regime_today: int, current_qty: int, cfg: TraderConfig):
+@njit(cache=True, inline="always")
+def _kahan_add(val: float, total: float, comp: float):
+    """Compensated (Kahan) total + val; returns the new (total, comp)."""
+    y = val - comp
+    t = total + y
+    return t, (t - total) - y
+
+
+@njit(cache=True)
+def _regime(px: np.ndarray, fast: int, slow: int) -> np.ndarray:
     """
-    If regime_today == 1: target is to be long (accumulate in chunks).
-    If regime_today == 0: target is flat (sell down in chunks).
-    Returns (side, qty) or None.
+    Fast/slow SMA crossover in one pass: both window sums are updated by adding the
+    entering price and subtracting the leaving one. 0 until both MAs are defined.
+    Follows pandas' rolling mean so long series do not drift: adds and removes are
+    Kahan-compensated (separately), and a window whose prices are all equal takes that
+    price as its mean exactly. Accepts float32 or float64 prices; sums are float64.
     """
-    if regime_today not in (0, 1):
-        return None
+    n = px.size
+    out = np.zeros(n, dtype=np.int8)
+    sf = 0.0
+    sf_add = 0.0
+    sf_rem = 0.0
+    ss = 0.0
+    ss_add = 0.0
+    ss_rem = 0.0
+    run = 0  # length of the run of equal prices ending at i
+    for i in range(n):
+        x = float(px[i])
+        if i >= fast:
+            sf, sf_rem = _kahan_add(-float(px[i - fast]), sf, sf_rem)
+        if i >= slow:
+            ss, ss_rem = _kahan_add(-float(px[i - slow]), ss, ss_rem)
+        sf, sf_add = _kahan_add(x, sf, sf_add)
+        ss, ss_add = _kahan_add(x, ss, ss_add)
+        run = run + 1 if i > 0 and x == px[i - 1] else 1
+
+        if i >= fast - 1 and i >= slow - 1:
+            fast_ma = x if run >= fast else sf / fast
+            slow_ma = x if run >= slow else ss / slow
+            if fast_ma > slow_ma:
+                out[i] = 1
+    return out
 
-    if regime_today == 1:
-        # accumulate up to some exposure externally controlled by risk limits
-        return ("BUY", cfg.trade_size)
 
-    # regime 0: de-risk
-    if current_qty <= 0:
-        return None
-    return ("SELL", min(cfg.trade_size, current_qty))
+def fill_intents(regime: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-day trade intents as int8 masks (want_buy, want_sell):
+      regime == 1: target is to be long (accumulate in chunks of trade_size)
+      regime == 0: target is flat (sell down in chunks, only while holding shares)
+    Any other regime value means no trade. Sizing against cash / current qty is done
+    by the simulation, which knows the running position.
+    """
+    reg = regime.to_numpy()
+    return (reg == 1).astype(np.int8), (reg == 0).astype(np.int8)